@@ -141,6 +141,27 @@ add the pattern after the name, prefixing the pattern with ":".
     >>> print easyurl.regex('<mmm:mon>')
     ^(?P<mmm>[a-z]{3})/$
 
+The ":" is required to separate the name from the pattern, and names may
+only contain letters, digits, and underscores.  Anything else between
+"<" and ">" is left as-is.
+
+.. sourcecode:: pycon
+
+    >>> print easyurl.regex('<year>')
+    ^(?P<year>\d{4})/$
+    >>> print easyurl.regex('<year:mon>')
+    ^(?P<year>[a-z]{3})/$
+    >>> print easyurl.regex('<zip-code>')
+    ^<zip-code>/$
+
+Names use the same definition of a letter as Python's ``re`` module, so
+on Python 2 non-ASCII names are left as-is too.
+
+.. sourcecode:: pycon
+
+    >>> easyurl.regex(u'<caf\xe9>')
+    u'^<caf\xe9>/$'
+
 It's easy to add new or override existing patterns:
 
 .. sourcecode:: pycon
@@ -152,6 +173,61 @@ It's easy to add new or override existing patterns:
     >>> print easyurl.regex('<year:yy>/<month:mm>/<day:dd>')
     ^(?P<year>\d{2})/(?P<month>\d{2})/(?P<day>\d{2})/$
 
+Each instance has its own patterns, so changing them doesn't affect any
+other instance.
+
+.. sourcecode:: pycon
+
+    >>> from easyurls import URLPatternGenerator
+    >>> other = URLPatternGenerator()
+    >>> other.patterns['foo'] = r'[a-z]+'
+    >>> print URLPatternGenerator().regex('<foo>')
+    ^(?P<foo>\d+)/$
+
+Generated regular expressions are cached, but changes to an instance's
+patterns or default pattern take effect immediately.
+
+.. sourcecode:: pycon
+
+    >>> print other.regex('<year>/<x>')
+    ^(?P<year>\d{4})/(?P<x>\d+)/$
+    >>> other['year'] = r'\d{2}'
+    >>> print other.regex('<year>/<x>')
+    ^(?P<year>\d{2})/(?P<x>\d+)/$
+    >>> other.patterns['year'] = r'\d{3}'
+    >>> other.default = r'\w+'
+    >>> print other.regex('<year>/<x>')
+    ^(?P<year>\d{3})/(?P<x>\w+)/$
+    >>> other.patterns = {'year': r'\d{1}'}
+    >>> print other.regex('<year>/<x>')
+    ^(?P<year>\d{1})/(?P<x>\w+)/$
+
+To make that possible, a ``patterns`` dict passed to
+``URLPatternGenerator``, or assigned to ``patterns``, is copied.  Make
+later changes through the instance rather than the original dict.
+
+.. sourcecode:: pycon
+
+    >>> mine = {'code': r'[A-Z]{3}'}
+    >>> gen = URLPatternGenerator(patterns=mine)
+    >>> gen['extra'] = r'\d'
+    >>> sorted(mine)
+    ['code']
+    >>> sorted(gen.patterns)
+    ['code', 'extra']
+
+Generators can be copied and pickled; caches are rebuilt afterwards.
+
+.. sourcecode:: pycon
+
+    >>> import copy
+    >>> clone = copy.deepcopy(other)
+    >>> clone['year'] = r'\d{4}'
+    >>> print clone.regex('<year>/<x>')
+    ^(?P<year>\d{4})/(?P<x>\w+)/$
+    >>> print other.regex('<year>/<x>')
+    ^(?P<year>\d{1})/(?P<x>\w+)/$
+
 By default, if no pattern is found, ``\d+`` is assumed.
 
 .. sourcecode:: pycon
@@ -191,11 +267,22 @@ Prepending of '^' and appending of '/' and '$' can be disabled.
 
     >>> easyurl.regex('foo', anchor=False, terminate=False, append_slash=False)
     'foo'
+
+To generate the regular expressions for many patterns at once, such as
+when building a large URLconf, use ``regex_many``.  It takes the same
+options as ``regex``.
+
+.. sourcecode:: pycon
+
+    >>> for r in easyurl.regex_many(['<year>', '<year>/<month:mm>']):
+    ...     print r
+    ^(?P<year>\d{4})/$
+    ^(?P<year>\d{4})/(?P<month>\d{2})/$
 """
 __version__ = '0.2'
 __all__ = ['easyurl', 'regex', 'URLPatternGenerator']
 
-import functools,re
+import re
 
 # name: pattern
 PATTERNS = {
@@ -212,51 +299,226 @@ PATTERNS = {
 }
 
 # <name[:pattern]>
-VARIABLE = re.compile(r'<(?P<name>\w+)(?::?(?P<pattern>[^>]+))?>')
+VARIABLE = re.compile(r'<(\w+)(?::([^>]+))?>')
+
+# placeholder name, using the same \w as VARIABLE
+NAME = re.compile(r'\w+\Z')
+
+# max generated regexes remembered per URLPatternGenerator
+CACHE_SIZE = 1024
+
+# django.conf.urls.defaults.url, imported on first use
+_django_url = None
+
+def _get_django_url():
+    global _django_url
+    from django.conf.urls.defaults import url
+    _django_url = url
+    return url
+
+
+class _Patterns(dict):
+    # name: pattern dict that reports changes, so cached regexes are
+    # invalidated however the patterns are modified
+    def __init__(self, changed, *args, **kw):
+        dict.__init__(self, *args, **kw)
+        self._changed = changed
+    
+    def __setitem__(self, name, pattern):
+        dict.__setitem__(self, name, pattern)
+        self._changed()
+    
+    def __delitem__(self, name):
+        dict.__delitem__(self, name)
+        self._changed()
+    
+    def clear(self):
+        dict.clear(self)
+        self._changed()
+    
+    def pop(self, *args):
+        pattern = dict.pop(self, *args)
+        self._changed()
+        return pattern
+    
+    def popitem(self):
+        item = dict.popitem(self)
+        self._changed()
+        return item
+    
+    def setdefault(self, name, pattern=None):
+        pattern = dict.setdefault(self, name, pattern)
+        self._changed()
+        return pattern
+    
+    def update(self, *args, **kw):
+        dict.update(self, *args, **kw)
+        self._changed()
+    
+    def __ior__(self, other):
+        self.update(other)
+        return self
+    
+    def __reduce__(self):
+        # copy and pickle as a plain dict; the owner re-wraps it
+        return (dict, (dict(self),))
 
 
 class URLPatternGenerator(object):
     def __init__(self, patterns=None, default=r'\d+',
                  append_slash=True, anchor=True, terminate=True):
-        self.patterns = patterns or dict(PATTERNS.items())
-        self.default = default              # default pattern
+        self._cache = {}                    # (url, options): regex
+        self._patterns = _Patterns(self._invalidate, patterns or PATTERNS)
+        self._default = default             # default pattern
         self.append_slash = append_slash    # trailing /
         self.anchor = anchor                # prepend ^
         self.terminate = terminate          # append $
+        self._reset_segments()              # name[:pattern]: (?P<name>...)
+    
+    def _get_patterns(self):
+        return self._patterns
+    def _set_patterns(self, patterns):
+        self._patterns = _Patterns(self._invalidate, patterns)
+        self._invalidate()
+    patterns = property(_get_patterns, _set_patterns)
+    
+    def __getstate__(self):
+        # caches are rebuilt on restore
+        state = self.__dict__.copy()
+        del state['_cache'], state['_segments']
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._cache = {}
+        self._patterns = _Patterns(self._invalidate, self._patterns)
+        self._reset_segments()
+    
+    def _get_default(self):
+        return self._default
+    def _set_default(self, default):
+        self._default = default
+        self._invalidate()
+    default = property(_get_default, _set_default)
     
     def add(self, name, pattern):
         self.patterns[name] = pattern
     __setitem__ = add
     
-    def _replace(self, match, url):
-        regexp = None
-        name = match.group('name')
-        pattern = match.group('pattern')
-        # pattern may be a name or regexp
-        if pattern:
-            regexp = self.patterns.get(pattern, pattern)
-        # use pattern for name, or default
-        else:
-            regexp = self.patterns.get(name, self.default)
-        segment = '(?P<%s>%s)' % (name, regexp)
-        return segment
+    def _invalidate(self):
+        # patterns or default changed; the pattern table is small, so
+        # re-rendering it beats tracking which segments used what
+        self._cache.clear()
+        self._reset_segments()
+    
+    def _reset_segments(self):
+        # pre-render <name> for each pattern whose name is usable as one
+        self._segments = dict((name, '(?P<%s>%s)' % (name, pattern))
+                              for name, pattern in self.patterns.items()
+                              if NAME.match(name))
     
     def url(self, path, *args, **kw):
         # replacement for django.conf.urls.defaults.url
-        from django.conf.urls.defaults import url as _url
+        _url = _django_url or _get_django_url()
         return _url(self.regex(path), *args, **kw)
     __call__ = url
     
-    def regex(self, url, **kw):
-        r = VARIABLE.sub(functools.partial(self._replace, url=url), url)
-        if kw.get('anchor', self.anchor) and r[:1] != '^':
-            r = '^' + r
-        # special-case so '^$' doesn't end up with a '/' in it
-        if url and kw.get('append_slash', self.append_slash) and r[-1:] not in ('$','/'):
-            r += '/'
-        if kw.get('terminate', self.terminate) and r[-1:] != '$':
-            r += '$'
+    def regex(self, url, anchor=None, append_slash=None, terminate=None):
+        # None means use the instance's setting
+        if anchor is None:
+            anchor = self.anchor
+        if append_slash is None:
+            append_slash = self.append_slash
+        if terminate is None:
+            terminate = self.terminate
+        key = (url, anchor, append_slash, terminate)
+        try:
+            return self._cache[key]
+        except KeyError:
+            pass
+        if len(self._cache) >= CACHE_SIZE:
+            self._cache.clear()
+        r = self._cache[key] = self._regex(*key)
         return r
+    
+    def regex_many(self, urls, anchor=None, append_slash=None, terminate=None):
+        regex = self.regex
+        return [regex(url, anchor, append_slash, terminate) for url in urls]
+    
+    def _substitute(self, url):
+        # replace every <name[:pattern]> matched by VARIABLE
+        patterns_get = self.patterns.get
+        default = self.default
+        def _sub(match):
+            name, pattern = match.group(1, 2)
+            # pattern may be a name or regexp
+            if pattern:
+                regexp = patterns_get(pattern, pattern)
+            # use pattern for name, or default
+            else:
+                regexp = patterns_get(name, default)
+            return '(?P<%s>%s)' % (name, regexp)
+        return VARIABLE.sub(_sub, url)
+    
+    def _scan(self, url):
+        patterns_get = self.patterns.get
+        default = self.default
+        segments = self._segments
+        segments_get = segments.get
+        is_name = NAME.match
+        # scan for <name[:pattern]> with str.find, falling back to
+        # VARIABLE for anything the simple grammar doesn't cover
+        out = []
+        append = out.append
+        find = url.find
+        i = 0
+        while True:
+            j = find('<', i)
+            if j < 0:
+                append(url[i:])
+                break
+            k = find('>', j)
+            if k < 0:
+                out = None
+                break
+            segment = url[j+1:k]
+            regexp = segments_get(segment)
+            if regexp is None:
+                name, colon, pattern = segment.partition(':')
+                # name must match \w+ and pattern [^>]+
+                if ('<' in segment or (colon and not pattern)
+                        or not is_name(name)):
+                    out = None
+                    break
+                if len(segments) >= CACHE_SIZE + len(self._patterns):
+                    # full: start over from the pre-rendered <name>s
+                    self._reset_segments()
+                    segments = self._segments
+                    segments_get = segments.get
+                if colon:
+                    regexp = patterns_get(pattern, pattern)
+                else:
+                    regexp = patterns_get(name, default)
+                regexp = segments[segment] = '(?P<%s>%s)' % (name, regexp)
+            append(url[i:j])
+            append(regexp)
+            i = k + 1
+        if out is None:
+            return self._substitute(url)
+        return ''.join(out)
+    
+    def _regex(self, url, anchor, append_slash, terminate):
+        # nothing to substitute without a '<'
+        r = self._scan(url) if '<' in url else url
+        prefix = '^' if anchor and not r.startswith('^') else ''
+        # special-case so '^$' doesn't end up with a '/' in it
+        if url and append_slash and not r.endswith(('$','/')):
+            suffix = '/$' if terminate else '/'
+        elif terminate and not r.endswith('$'):
+            suffix = '$'
+        else:
+            suffix = ''
+        return ''.join((prefix, r, suffix))
 
 
 # don't require creating an instance of the class